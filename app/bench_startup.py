@@ -0,0 +1,58 @@
+# app/bench_startup.py
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+# Runs in a fresh interpreter: import the app, run its startup, report timings
+_PROBE = """
+import asyncio, json, time
+t0 = time.perf_counter()
+import app.main
+t1 = time.perf_counter()
+async def start():
+    async with app.main.app.router.lifespan_context(app.main.app):
+        return time.perf_counter()
+t2 = asyncio.run(start())
+print(json.dumps({"importSeconds": t1 - t0, "readySeconds": t2 - t0}))
+"""
+
+def measure_once() -> dict:
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", _PROBE],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings["processSeconds"] = time.perf_counter() - started
+    return timings
+
+def run_benchmark(runs: int) -> dict:
+    """
+    Start the app `runs` times in fresh processes.
+    Returns min / median / max for each timing:
+    - importSeconds: importing app.main
+    - readySeconds: import plus lifespan startup (engine + pool pre-warm)
+    - processSeconds: the whole process, including interpreter startup
+    """
+    samples = [measure_once() for _ in range(runs)]
+    report = {}
+    for key in ("importSeconds", "readySeconds", "processSeconds"):
+        values = [s[key] for s in samples]
+        report[key] = {
+            "min": min(values),
+            "median": statistics.median(values),
+            "max": max(values),
+        }
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure import-to-ready latency of the API.")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(json.dumps(run_benchmark(args.runs), indent=2))
@@ -0,0 +1,87 @@
+# app/bench_workers.py
+import argparse
+import json
+import subprocess
+import sys
+import time
+import uuid
+
+from sqlalchemy import text
+
+from app.database import SessionLocal
+from app.services.exports import EXPORT_DIR
+from app.services.queue import enqueue_job
+
+CONSUMER_PREFIX = "bench-worker"
+
+def _enqueue_full_jobs(count: int) -> dict:
+    # job_id -> (consumer_id, output_filename), one consumer per job so
+    # no two jobs wait on the same consumer lock
+    jobs = {}
+    db = SessionLocal()
+    try:
+        for i in range(count):
+            job_id = str(uuid.uuid4())
+            consumer_id = f"{CONSUMER_PREFIX}-{i}"
+            filename = f"full_{consumer_id}_{job_id}.csv"
+            enqueue_job(db, job_id, consumer_id, "full", filename)
+            jobs[job_id] = (consumer_id, filename)
+        db.commit()
+    finally:
+        db.close()
+    return jobs
+
+def _drain(worker_count: int) -> float:
+    started = time.perf_counter()
+    workers = [
+        subprocess.Popen([sys.executable, "-m", "app.worker", "--drain"])
+        for _ in range(worker_count)
+    ]
+    for worker in workers:
+        worker.wait()
+    return time.perf_counter() - started
+
+def _cleanup(jobs: dict) -> None:
+    # Remove the files, catalog rows, watermarks and jobs the run created,
+    # so benchmark exports never become rollup bases
+    filenames = [filename for _, filename in jobs.values()]
+    consumer_ids = [consumer_id for consumer_id, _ in jobs.values()]
+    for filename in filenames:
+        (EXPORT_DIR / filename).unlink(missing_ok=True)
+    db = SessionLocal()
+    try:
+        db.execute(text("DELETE FROM export_files WHERE filename = ANY(:f)"), {"f": filenames})
+        db.execute(text("DELETE FROM watermarks WHERE consumer_id = ANY(:c)"), {"c": consumer_ids})
+        db.execute(text("DELETE FROM export_jobs WHERE id = ANY(:ids)"), {"ids": list(jobs)})
+        db.commit()
+    finally:
+        db.close()
+
+def run_benchmark(jobs_count: int, worker_counts: list[int]) -> dict:
+    """
+    For each worker count, queue jobs_count full exports for distinct
+    consumers and time how long that many worker processes take to drain
+    them. Returns seconds and speedup relative to the first worker count.
+    """
+    report = {}
+    baseline = None
+    for worker_count in worker_counts:
+        jobs = _enqueue_full_jobs(jobs_count)
+        try:
+            seconds = _drain(worker_count)
+        finally:
+            _cleanup(jobs)
+        baseline = baseline or seconds
+        report[str(worker_count)] = {
+            "seconds": seconds,
+            "speedup": baseline / seconds,
+        }
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure export throughput against the number of workers.")
+    parser.add_argument("--jobs", type=int, default=6)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 3])
+    args = parser.parse_args()
+
+    print(json.dumps(run_benchmark(args.jobs, args.workers), indent=2))
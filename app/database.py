@@ -1,16 +1,108 @@
 # app/database.py
 import os
-from sqlalchemy import create_engine
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 
-DATABASE_URL = os.environ.get("DATABASE_URL")
+# Connections kept open in the pool, and how many of them to open at startup
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "5"))
+DB_POOL_PREWARM = int(os.environ.get("DB_POOL_PREWARM", str(DB_POOL_SIZE)))
+
+# Seconds to wait for a new connection, so an unreachable host cannot
+# stall startup until the OS TCP timeout
+DB_CONNECT_TIMEOUT = int(os.environ.get("DB_CONNECT_TIMEOUT", "5"))
+
+_engine: Engine | None = None
+_engine_lock = threading.Lock()
+
+
+class _LazySessionmaker(sessionmaker):
+    # Creates the engine on first use, so importing the app needs no database
+    def __call__(self, **local_kw):
+        if self.kw.get("bind") is None and "bind" not in local_kw:
+            get_engine()
+        return super().__call__(**local_kw)
 
-engine = create_engine(DATABASE_URL, echo=False, future=True)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, future=True)
+SessionLocal = _LazySessionmaker(autocommit=False, autoflush=False, future=True)
 
 Base = declarative_base()
 
+
+def get_engine() -> Engine:
+    """
+    Return the shared engine, creating it from DATABASE_URL on first call.
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                database_url = os.environ.get("DATABASE_URL")
+                if not database_url:
+                    raise RuntimeError("DATABASE_URL is not set")
+                _engine = create_engine(
+                    database_url,
+                    echo=False,
+                    future=True,
+                    pool_size=DB_POOL_SIZE,
+                    connect_args={"connect_timeout": DB_CONNECT_TIMEOUT},
+                )
+                SessionLocal.configure(bind=_engine)
+    return _engine
+
+
+def prewarm_pool(count: int = DB_POOL_PREWARM) -> int:
+    """
+    Open up to count pooled connections in parallel and hand them back to
+    the pool, so the first requests do not pay for connection setup.
+    Returns number of connections warmed.
+    """
+    engine = get_engine()
+    count = min(count, DB_POOL_SIZE)
+    if count <= 0:
+        return 0
+
+    def connect():
+        conn = engine.connect()
+        conn.execute(text("SELECT 1"))
+        return conn
+
+    # Keep every connection checked out until all are open, otherwise the
+    # pool would hand the same connection back out instead of opening a new one
+    with ThreadPoolExecutor(max_workers=count) as pool:
+        futures = [pool.submit(connect) for _ in range(count)]
+        wait(futures)
+
+    errors = [f.exception() for f in futures if f.exception() is not None]
+    for f in futures:
+        if f.exception() is None:
+            f.result().close()
+    if errors:
+        raise errors[0]
+
+    return count
+
+
+def dispose_engine() -> None:
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+            _engine = None
+            SessionLocal.configure(bind=None)
+
+
+def __getattr__(name: str):
+    # Keep `from app.database import engine` working without creating
+    # the engine at import time
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 def get_db():
     db = SessionLocal()
     try:
@@ -1,17 +1,89 @@
 # app/main.py
 
+import time
+
+# Taken before the heavy imports below, so startup logs cover them
+_IMPORT_STARTED_AT = time.perf_counter()
+
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from datetime import datetime, timezone
+import logging
 import uuid
 
-from fastapi import FastAPI, BackgroundTasks, Header, HTTPException, Depends
+from fastapi import FastAPI, BackgroundTasks, Header, HTTPException, Depends, Response
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
 from app.schemas import HealthResponse, ExportJobResponse, WatermarkResponse
-from app.database import get_db
-from app.services.jobs import run_export_job
+from app.database import get_db, prewarm_pool, dispose_engine
+from app.services.jobs import run_export_job, run_rollup_job
+from app.services.probe import plan_export_window
+from app.services.queue import QUEUE_MODE, enqueue_job
+from app.services.rollup import ROLLUP_INTERVAL_SECONDS, has_pending_rollup
 from app.services.watermark import get_watermark
 
-app = FastAPI()
+logger = logging.getLogger(__name__)
+
+
+def _make_snapshot_filename() -> str:
+    ts = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    return f"snapshot_{ts}.csv"
+
+
+async def _rollup_loop(interval: float):
+    # Every app process runs this loop; the global rollup lock lets one
+    # node compact at a time while the others skip that round
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_in_threadpool(run_rollup_job, str(uuid.uuid4()), _make_snapshot_filename())
+        except Exception:
+            # run_rollup_job already logged rollup_failed; try again next round
+            pass
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Create the engine and pre-warm its pool before serving requests,
+    and start the periodic snapshot rollup.
+    A database that is not reachable yet does not block startup; the
+    engine is then created on first use instead.
+    """
+    prewarm_started_at = time.perf_counter()
+    connections_warmed = 0
+    try:
+        connections_warmed = await run_in_threadpool(prewarm_pool)
+    except Exception as e:
+        logger.warning({
+            "event": "pool_prewarm_failed",
+            "error": str(e),
+        })
+    ready_at = time.perf_counter()
+
+    logger.info({
+        "event": "startup_ready",
+        "connectionsWarmed": connections_warmed,
+        "importSeconds": prewarm_started_at - _IMPORT_STARTED_AT,
+        "prewarmSeconds": ready_at - prewarm_started_at,
+        "readySeconds": ready_at - _IMPORT_STARTED_AT,
+    })
+
+    rollup_task = None
+    if ROLLUP_INTERVAL_SECONDS > 0:
+        rollup_task = asyncio.create_task(_rollup_loop(ROLLUP_INTERVAL_SECONDS))
+
+    yield
+
+    if rollup_task is not None:
+        rollup_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await rollup_task
+    dispose_engine()
+
+
+app = FastAPI(lifespan=lifespan)
 
 
 @app.get("/health", response_model=HealthResponse)
@@ -34,59 +106,120 @@ def _make_output_filename(export_type: str, consumer_id: str) -> str:
     return f"{export_type}_{safe_consumer}_{ts}.csv"
 
 
-@app.post("/exports/full", response_model=ExportJobResponse, status_code=202)
-def trigger_full_export(
+def _dispatch_export(
     background_tasks: BackgroundTasks,
-    x_consumer_id: str | None = Header(default=None, alias="X-Consumer-ID"),
-):
-    consumer_id = _require_consumer_id(x_consumer_id)
+    db: Session,
+    consumer_id: str,
+    export_type: str,
+    chunked: bool = False,
+) -> dict:
+    """
+    Start an export job and return its response body.
+    In queue mode the job is stored in export_jobs for any worker node
+    to claim; otherwise it runs as an in-process background task.
+    """
     job_id = str(uuid.uuid4())
-    filename = _make_output_filename("full", consumer_id)
-
-    background_tasks.add_task(run_export_job, job_id, consumer_id, "full", filename)
+    filename = _make_output_filename(export_type, consumer_id)
+
+    if QUEUE_MODE == "queue":
+        enqueue_job(db, job_id, consumer_id, export_type, filename, chunked)
+        db.commit()
+        status = "queued"
+    else:
+        # Inline jobs have no retry, so they wait for the consumer's lock
+        # instead of dropping a job the client was told has started
+        background_tasks.add_task(
+            run_export_job, job_id, consumer_id, export_type, filename, chunked, wait_for_lock=True
+        )
+        status = "started"
 
     return {
         "jobId": job_id,
-        "status": "started",
-        "exportType": "full",
+        "status": status,
+        "exportType": export_type,
         "outputFilename": filename,
     }
 
 
+def _skipped_response(response: Response, export_type: str) -> dict:
+    # Nothing to export or compact: no job is created
+    response.status_code = 200
+    return {
+        "jobId": None,
+        "status": "skipped",
+        "exportType": export_type,
+        "outputFilename": None,
+    }
+
+
+@app.post("/exports/full", response_model=ExportJobResponse, status_code=202)
+def trigger_full_export(
+    background_tasks: BackgroundTasks,
+    x_consumer_id: str | None = Header(default=None, alias="X-Consumer-ID"),
+    db: Session = Depends(get_db),
+):
+    consumer_id = _require_consumer_id(x_consumer_id)
+    return _dispatch_export(background_tasks, db, consumer_id, "full")
+
+
 @app.post("/exports/incremental", response_model=ExportJobResponse, status_code=202)
 def trigger_incremental_export(
     background_tasks: BackgroundTasks,
+    response: Response,
     x_consumer_id: str | None = Header(default=None, alias="X-Consumer-ID"),
+    db: Session = Depends(get_db),
 ):
     consumer_id = _require_consumer_id(x_consumer_id)
-    job_id = str(uuid.uuid4())
-    filename = _make_output_filename("incremental", consumer_id)
+    plan = plan_export_window(db, consumer_id, "incremental")
+    if plan == "empty":
+        return _skipped_response(response, "incremental")
 
-    background_tasks.add_task(run_export_job, job_id, consumer_id, "incremental", filename)
-
-    return {
-        "jobId": job_id,
-        "status": "started",
-        "exportType": "incremental",
-        "outputFilename": filename,
-    }
+    return _dispatch_export(background_tasks, db, consumer_id, "incremental", plan == "chunked")
 
 
 @app.post("/exports/delta", response_model=ExportJobResponse, status_code=202)
 def trigger_delta_export(
+    background_tasks: BackgroundTasks,
+    response: Response,
+    x_consumer_id: str | None = Header(default=None, alias="X-Consumer-ID"),
+    db: Session = Depends(get_db),
+):
+    consumer_id = _require_consumer_id(x_consumer_id)
+    plan = plan_export_window(db, consumer_id, "delta")
+    if plan == "empty":
+        return _skipped_response(response, "delta")
+
+    return _dispatch_export(background_tasks, db, consumer_id, "delta", plan == "chunked")
+
+
+@app.post("/exports/bootstrap", response_model=ExportJobResponse, status_code=202)
+def trigger_bootstrap_export(
     background_tasks: BackgroundTasks,
     x_consumer_id: str | None = Header(default=None, alias="X-Consumer-ID"),
+    db: Session = Depends(get_db),
 ):
     consumer_id = _require_consumer_id(x_consumer_id)
+    return _dispatch_export(background_tasks, db, consumer_id, "bootstrap")
+
+
+@app.post("/exports/rollup", response_model=ExportJobResponse, status_code=202)
+def trigger_rollup(
+    background_tasks: BackgroundTasks,
+    response: Response,
+    db: Session = Depends(get_db),
+):
+    if not has_pending_rollup(db):
+        return _skipped_response(response, "rollup")
+
     job_id = str(uuid.uuid4())
-    filename = _make_output_filename("delta", consumer_id)
+    filename = _make_snapshot_filename()
 
-    background_tasks.add_task(run_export_job, job_id, consumer_id, "delta", filename)
+    background_tasks.add_task(run_rollup_job, job_id, filename)
 
     return {
         "jobId": job_id,
         "status": "started",
-        "exportType": "delta",
+        "exportType": "rollup",
         "outputFilename": filename,
     }
 
@@ -1,5 +1,5 @@
 # app/models.py
-from sqlalchemy import Column, BigInteger, String, Boolean, DateTime, Integer
+from sqlalchemy import Column, BigInteger, String, Boolean, DateTime, Integer, Text
 from sqlalchemy.sql import func
 from .database import Base
 
@@ -20,3 +20,30 @@ class Watermark(Base):
     consumer_id = Column(String(255), nullable=False, unique=True, index=True)
     last_exported_at = Column(DateTime(timezone=True), nullable=False)
     updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+class ExportFile(Base):
+    __tablename__ = "export_files"
+
+    id = Column(Integer, primary_key=True, index=True)
+    filename = Column(String(512), nullable=False, unique=True)
+    export_type = Column(String(32), nullable=False, index=True)
+    range_start = Column(DateTime(timezone=True), nullable=True)
+    range_end = Column(DateTime(timezone=True), nullable=False, index=True)
+    row_count = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+class ExportJob(Base):
+    __tablename__ = "export_jobs"
+
+    id = Column(String(36), primary_key=True)
+    consumer_id = Column(String(255), nullable=False, index=True)
+    export_type = Column(String(32), nullable=False)
+    output_filename = Column(String(512), nullable=False)
+    chunked = Column(Boolean, nullable=False, default=False)
+    status = Column(String(16), nullable=False, default="queued", index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    worker_id = Column(String(255), nullable=True)
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
@@ -9,10 +9,10 @@ class HealthResponse(BaseModel):
 
 
 class ExportJobResponse(BaseModel):
-    jobId: str
+    jobId: str | None
     status: str
     exportType: str
-    outputFilename: str
+    outputFilename: str | None
 
 
 class WatermarkResponse(BaseModel):
@@ -1,10 +1,12 @@
+import csv
+import io
 import os
 from urllib.parse import urlparse
 from datetime import datetime, timedelta, timezone
 import random
-import psycopg2
-from faker import Faker
 def get_connection_from_database_url():
+    # Imported here so importing this module stays cheap
+    import psycopg2
     database_url = os.environ["DATABASE_URL"]
     url = urlparse(database_url)
     dbname = url.path.lstrip("/")
@@ -16,7 +18,29 @@ def get_connection_from_database_url():
         port=url.port or 5432,
     )
     return conn
+def _make_batch_csv(fake, now, size):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for _ in range(size):
+        delta_days = random.randint(0, 30)
+        created_at = now - timedelta(days=delta_days, hours=random.randint(0, 23), minutes=random.randint(0, 59))
+        if random.random() < 0.5:
+            updated_at = created_at
+        else:
+            updated_at = created_at + timedelta(
+                days=random.randint(0, 3),
+                hours=random.randint(0, 23),
+                minutes=random.randint(0, 59),
+            )
+            if updated_at > now:
+                updated_at = now
+        is_deleted = random.random() < 0.03
+        writer.writerow([fake.name(), fake.unique.email(), created_at.isoformat(), updated_at.isoformat(), is_deleted])
+    buf.seek(0)
+    return buf
 def seed_users():
+    # Faker is slow to import and only needed here, never on the request path
+    from faker import Faker
     fake = Faker()
     target_count = 100_000
     conn = get_connection_from_database_url()
@@ -32,40 +56,35 @@ def seed_users():
     remaining = target_count - current_count
     print(f"Seeding {remaining} users...")
     now = datetime.now(timezone.utc)
-    min_days = 0
-    max_days = 30
-    batch_size = 1000
+    batch_size = 20_000
     inserted = 0
-    insert_sql = '''
-        INSERT INTO users (name, email, created_at, updated_at, is_deleted)
-        VALUES (%s, %s, %s, %s, %s)
-        ON CONFLICT (email) DO NOTHING;
-    '''
+    # COPY cannot skip conflicting rows, so batches are copied into a
+    # temp table first and moved over with ON CONFLICT DO NOTHING
+    cur.execute('''
+        CREATE TEMP TABLE users_seed (
+            name VARCHAR(255),
+            email VARCHAR(255),
+            created_at TIMESTAMPTZ,
+            updated_at TIMESTAMPTZ,
+            is_deleted BOOLEAN
+        ) ON COMMIT DELETE ROWS;
+    ''')
     while inserted < remaining:
-        batch = []
-        for _ in range(min(batch_size, remaining - inserted)):
-            delta_days = random.randint(min_days, max_days)
-            created_at = now - timedelta(days=delta_days, hours=random.randint(0, 23), minutes=random.randint(0, 59))
-            if random.random() < 0.5:
-                updated_at = created_at
-            else:
-                updated_at = created_at + timedelta(
-                    days=random.randint(0, 3),
-                    hours=random.randint(0, 23),
-                    minutes=random.randint(0, 59),
-                )
-                if updated_at > now:
-                    updated_at = now
-            name = fake.name()
-            email = fake.unique.email()
-            is_deleted = random.random() < 0.03
-            batch.append((name, email, created_at, updated_at, is_deleted))
-        cur.executemany(insert_sql, batch)
-        inserted += len(batch)
+        size = min(batch_size, remaining - inserted)
+        cur.copy_expert(
+            "COPY users_seed (name, email, created_at, updated_at, is_deleted) FROM STDIN WITH (FORMAT csv)",
+            _make_batch_csv(fake, now, size),
+        )
+        cur.execute('''
+            INSERT INTO users (name, email, created_at, updated_at, is_deleted)
+            SELECT name, email, created_at, updated_at, is_deleted FROM users_seed
+            ON CONFLICT (email) DO NOTHING;
+        ''')
+        inserted += size
         conn.commit()
         print(f"Inserted {inserted}/{remaining} users...")
     cur.close()
     conn.close()
     print("Seeding complete.")
 if __name__ == "__main__":
-    seed_users()
\ No newline at end of file
+    seed_users()
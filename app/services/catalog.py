@@ -0,0 +1,61 @@
+# app/services/catalog.py
+from datetime import datetime
+from sqlalchemy.orm import Session
+from sqlalchemy import select
+from app.models import ExportFile
+
+# Export types whose files hold a complete image of the non-deleted users
+BASE_EXPORT_TYPES = ("full", "snapshot")
+
+def record_export_file(
+    db: Session,
+    filename: str,
+    export_type: str,
+    range_start: datetime | None,
+    range_end: datetime,
+    row_count: int,
+) -> None:
+    stmt = select(ExportFile).where(ExportFile.filename == filename)
+    ef = db.execute(stmt).scalar_one_or_none()
+
+    if ef is None:
+        ef = ExportFile(filename=filename)
+        db.add(ef)
+
+    ef.export_type = export_type
+    ef.range_start = range_start
+    ef.range_end = range_end
+    ef.row_count = row_count
+
+    db.flush()
+
+def get_base_files(db: Session) -> list[ExportFile]:
+    stmt = (
+        select(ExportFile)
+        .where(ExportFile.export_type.in_(BASE_EXPORT_TYPES))
+        .order_by(ExportFile.range_end.desc(), ExportFile.id.desc())
+    )
+    return list(db.execute(stmt).scalars())
+
+def get_delta_files_after(db: Session, since: datetime) -> list[ExportFile]:
+    stmt = (
+        select(ExportFile)
+        .where(
+            ExportFile.export_type == "delta",
+            ExportFile.range_end > since,
+        )
+        .order_by(ExportFile.range_start, ExportFile.range_end)
+    )
+    return list(db.execute(stmt).scalars())
+
+def get_snapshot_files(db: Session) -> list[ExportFile]:
+    stmt = (
+        select(ExportFile)
+        .where(ExportFile.export_type == "snapshot")
+        .order_by(ExportFile.range_end.desc(), ExportFile.id.desc())
+    )
+    return list(db.execute(stmt).scalars())
+
+def delete_export_file(db: Session, ef: ExportFile) -> None:
+    db.delete(ef)
+    db.flush()
@@ -1,6 +1,7 @@
 # app/services/exports.py
 
 import csv
+import os
 from datetime import datetime
 from pathlib import Path
 from typing import Literal
@@ -10,11 +11,18 @@ from sqlalchemy import select, and_
 
 from app.models import User
 from app.services.watermark import get_watermark, upsert_watermark
+from app.services.catalog import record_export_file
 
 # Directory where CSV files will be written (mapped to ./output on host)
 EXPORT_DIR = Path("output")
 
-ExportType = Literal["full", "incremental", "delta"]
+# Batch size for the chunked path used on very large windows
+EXPORT_CHUNK_SIZE = int(os.environ.get("EXPORT_CHUNK_SIZE", "10000"))
+
+ExportType = Literal["full", "incremental", "delta", "bootstrap"]
+
+CSV_HEADER = ["id", "name", "email", "created_at", "updated_at", "is_deleted"]
+DELTA_CSV_HEADER = ["operation"] + CSV_HEADER
 
 
 def _write_users_to_csv(rows, filepath: Path, include_operation: bool = False) -> int:
@@ -27,12 +35,7 @@ def _write_users_to_csv(rows, filepath: Path, include_operation: bool = False) -
     with filepath.open("w", newline="", encoding="utf-8") as f:
         writer = csv.writer(f)
 
-        if include_operation:
-            header = ["operation", "id", "name", "email", "created_at", "updated_at", "is_deleted"]
-        else:
-            header = ["id", "name", "email", "created_at", "updated_at", "is_deleted"]
-
-        writer.writerow(header)
+        writer.writerow(DELTA_CSV_HEADER if include_operation else CSV_HEADER)
 
         count = 0
         for user in rows:
@@ -67,12 +70,50 @@ def _write_users_to_csv(rows, filepath: Path, include_operation: bool = False) -
     return count
 
 
+def _export_window(
+    db: Session,
+    stmt,
+    filepath: Path,
+    include_operation: bool,
+    chunk_size: int | None = None,
+) -> tuple[int, datetime | None]:
+    """
+    Run a window query (ordered by updated_at) and write its rows to CSV.
+    Without chunk_size all rows are loaded at once; with chunk_size they are
+    streamed from a server-side cursor in batches of that size.
+    Returns (rows written, max updated_at). Writes no file if the window is empty.
+    """
+    if chunk_size is None:
+        users = list(db.execute(stmt).scalars())
+        if not users:
+            return 0, None
+        rows_exported = _write_users_to_csv(users, filepath, include_operation=include_operation)
+        return rows_exported, max(u.updated_at for u in users)
+
+    last_updated_at = None
+
+    def track(users):
+        # Rows arrive ordered by updated_at, so the last one holds the max
+        nonlocal last_updated_at
+        for user in users:
+            last_updated_at = user.updated_at
+            yield user
+
+    users = db.execute(stmt.execution_options(yield_per=chunk_size)).scalars()
+    rows_exported = _write_users_to_csv(track(users), filepath, include_operation=include_operation)
+    if rows_exported == 0:
+        filepath.unlink(missing_ok=True)
+        return 0, None
+    return rows_exported, last_updated_at
+
+
 def run_full_export(db: Session, consumer_id: str, output_filename: str) -> int:
     """
     Full export:
     - Export all users where is_deleted = FALSE.
     - Write to CSV.
     - Update watermark for consumer to max(updated_at) of exported rows.
+    - Record the file in the export catalog so it can seed snapshot rollups.
     Returns number of exported rows.
     """
     filepath = EXPORT_DIR / output_filename
@@ -91,16 +132,22 @@ def run_full_export(db: Session, consumer_id: str, output_filename: str) -> int:
 
     max_updated_at = max(u.updated_at for u in users)
     upsert_watermark(db, consumer_id, max_updated_at)
+    record_export_file(db, output_filename, "full", None, max_updated_at, rows_exported)
 
     return rows_exported
 
 
-def run_incremental_export(db: Session, consumer_id: str, output_filename: str) -> int:
+def run_incremental_export(
+    db: Session,
+    consumer_id: str,
+    output_filename: str,
+    chunk_size: int | None = None,
+) -> int:
     """
     Incremental export:
     - Requires an existing watermark for the consumer.
     - Export users where updated_at > last_exported_at AND is_deleted = FALSE.
-    - Write to CSV.
+    - Write to CSV (streamed in batches of chunk_size if given).
     - Update watermark to max(updated_at) of exported rows.
     Returns number of exported rows.
     """
@@ -122,29 +169,36 @@ def run_incremental_export(db: Session, consumer_id: str, output_filename: str)
         )
         .order_by(User.updated_at)
     )
-    users = list(db.execute(stmt).scalars())
+    rows_exported, max_updated_at = _export_window(
+        db, stmt, filepath, include_operation=False, chunk_size=chunk_size
+    )
 
-    if not users:
+    if not rows_exported:
         return 0
 
-    rows_exported = _write_users_to_csv(users, filepath, include_operation=False)
-
-    max_updated_at = max(u.updated_at for u in users)
     upsert_watermark(db, consumer_id, max_updated_at)
 
     return rows_exported
 
 
-def run_delta_export(db: Session, consumer_id: str, output_filename: str) -> int:
+def run_delta_export(
+    db: Session,
+    consumer_id: str,
+    output_filename: str,
+    chunk_size: int | None = None,
+) -> int:
     """
     Delta export:
     - Requires an existing watermark.
     - Export users where updated_at > last_exported_at (including soft-deleted).
-    - Write to CSV with extra first column 'operation':
+    - Write to CSV (streamed in batches of chunk_size if given) with extra
+      first column 'operation':
         - 'DELETE' if is_deleted = TRUE
         - 'INSERT' if created_at == updated_at
         - 'UPDATE' otherwise
     - Update watermark to max(updated_at) of exported rows.
+    - Record the file and its (last_exported_at, max(updated_at)] range in
+      the export catalog so it can be chained onto snapshot rollups.
     Returns number of exported rows.
     """
     filepath = EXPORT_DIR / output_filename
@@ -153,19 +207,22 @@ def run_delta_export(db: Session, consumer_id: str, output_filename: str) -> int
     if wm is None:
         return 0
 
+    # upsert_watermark updates wm in place, so keep the window start
+    range_start = wm.last_exported_at
+
     stmt = (
         select(User)
-        .where(User.updated_at > wm.last_exported_at)
+        .where(User.updated_at > range_start)
         .order_by(User.updated_at)
     )
-    users = list(db.execute(stmt).scalars())
+    rows_exported, max_updated_at = _export_window(
+        db, stmt, filepath, include_operation=True, chunk_size=chunk_size
+    )
 
-    if not users:
+    if not rows_exported:
         return 0
 
-    rows_exported = _write_users_to_csv(users, filepath, include_operation=True)
-
-    max_updated_at = max(u.updated_at for u in users)
     upsert_watermark(db, consumer_id, max_updated_at)
+    record_export_file(db, output_filename, "delta", range_start, max_updated_at, rows_exported)
 
     return rows_exported
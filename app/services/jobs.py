@@ -8,34 +8,67 @@ from sqlalchemy.orm import Session
 
 from app.database import SessionLocal
 from app.services.exports import (
+    EXPORT_CHUNK_SIZE,
     run_full_export,
     run_incremental_export,
     run_delta_export,
 )
+from app.services.locks import ROLLUP_LOCK_KEY, consumer_lock, try_consumer_lock, try_xact_lock
+from app.services.rollup import run_bootstrap_export, run_rollup
 
 logger = logging.getLogger(__name__)
 
-ExportType = Literal["full", "incremental", "delta"]
+ExportType = Literal["full", "incremental", "delta", "bootstrap"]
 
-def run_export_job(job_id: str, consumer_id: str, export_type: ExportType, output_filename: str):
+def run_export_job(
+    job_id: str,
+    consumer_id: str,
+    export_type: ExportType,
+    output_filename: str,
+    chunked: bool = False,
+    wait_for_lock: bool = False,
+) -> int | None:
+    """
+    Run one export for a consumer in its own transaction.
+    Holds a per-consumer advisory lock for the whole transaction, so two
+    nodes never export the same consumer at once. With wait_for_lock the
+    job waits for an export already holding the consumer to finish;
+    otherwise it gives up straight away.
+    Returns rows exported, or None if it gave up because the consumer was held.
+    """
     start = time.time()
     rows_exported = 0
+    chunk_size = EXPORT_CHUNK_SIZE if chunked else None
 
     logger.info({
         "event": "export_started",
         "jobId": job_id,
         "consumerId": consumer_id,
         "exportType": export_type,
+        "chunked": chunked,
     })
 
     db: Session = SessionLocal()
     try:
+        if wait_for_lock:
+            consumer_lock(db, consumer_id)
+        elif not try_consumer_lock(db, consumer_id):
+            db.rollback()
+            logger.info({
+                "event": "export_skipped_locked",
+                "jobId": job_id,
+                "consumerId": consumer_id,
+            })
+            return None
+
         if export_type == "full":
             rows_exported = run_full_export(db, consumer_id, output_filename)
         elif export_type == "incremental":
-            rows_exported = run_incremental_export(db, consumer_id, output_filename)
+            rows_exported = run_incremental_export(db, consumer_id, output_filename, chunk_size)
         elif export_type == "delta":
-            rows_exported = run_delta_export(db, consumer_id, output_filename)
+            rows_exported = run_delta_export(db, consumer_id, output_filename, chunk_size)
+        elif export_type == "bootstrap":
+            rows_exported = run_bootstrap_export(db, consumer_id, output_filename)
         else:
             raise ValueError(f"Unknown export type: {export_type}")
 
@@ -48,6 +81,7 @@ def run_export_job(job_id: str, consumer_id: str, export_type: ExportType, outpu
             "rowsExported": rows_exported,
             "durationSeconds": duration,
         })
+        return rows_exported
     except Exception as e:
         db.rollback()
         logger.error({
@@ -58,3 +92,43 @@ def run_export_job(job_id: str, consumer_id: str, export_type: ExportType, outpu
         raise
     finally:
         db.close()
+
+
+def run_rollup_job(job_id: str, output_filename: str):
+    start = time.time()
+
+    logger.info({
+        "event": "rollup_started",
+        "jobId": job_id,
+    })
+
+    db: Session = SessionLocal()
+    try:
+        if not try_xact_lock(db, ROLLUP_LOCK_KEY):
+            db.rollback()
+            logger.info({
+                "event": "rollup_skipped_locked",
+                "jobId": job_id,
+            })
+            return
+
+        rows_written = run_rollup(db, output_filename)
+        db.commit()
+
+        duration = time.time() - start
+        logger.info({
+            "event": "rollup_completed",
+            "jobId": job_id,
+            "rowsWritten": rows_written,
+            "durationSeconds": duration,
+        })
+    except Exception as e:
+        db.rollback()
+        logger.error({
+            "event": "rollup_failed",
+            "jobId": job_id,
+            "error": str(e),
+        })
+        raise
+    finally:
+        db.close()
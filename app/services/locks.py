@@ -0,0 +1,33 @@
+# app/services/locks.py
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+
+# First key of every advisory lock taken by this service, so our locks
+# cannot collide with advisory locks used by other applications
+LOCK_NAMESPACE = 0x0CDC
+
+ROLLUP_LOCK_KEY = "rollup"
+
+def try_xact_lock(db: Session, key: str) -> bool:
+    """
+    Try to take a transaction-scoped advisory lock on key without waiting.
+    The lock is released automatically when the session commits or rolls back.
+    """
+    stmt = text("SELECT pg_try_advisory_xact_lock(:namespace, hashtext(:key))")
+    return db.execute(stmt, {"namespace": LOCK_NAMESPACE, "key": key}).scalar_one()
+
+def xact_lock(db: Session, key: str) -> None:
+    """
+    Take a transaction-scoped advisory lock on key, waiting until it is free.
+    """
+    stmt = text("SELECT pg_advisory_xact_lock(:namespace, hashtext(:key))")
+    db.execute(stmt, {"namespace": LOCK_NAMESPACE, "key": key})
+
+def _consumer_key(consumer_id: str) -> str:
+    return f"consumer:{consumer_id}"
+
+def try_consumer_lock(db: Session, consumer_id: str) -> bool:
+    return try_xact_lock(db, _consumer_key(consumer_id))
+
+def consumer_lock(db: Session, consumer_id: str) -> None:
+    xact_lock(db, _consumer_key(consumer_id))
@@ -0,0 +1,158 @@
+# app/services/queue.py
+
+import os
+from datetime import timedelta
+
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import select, update, and_, or_, exists, func
+
+from app.models import ExportJob
+
+# "inline" runs exports as in-process background tasks,
+# "queue" puts them in export_jobs for app.worker processes to claim
+QUEUE_MODE = os.environ.get("EXPORT_QUEUE_MODE", "inline")
+
+# How long a claimed job stays owned by a worker without a heartbeat
+LEASE_SECONDS = int(os.environ.get("EXPORT_JOB_LEASE_SECONDS", "60"))
+
+# Claims allowed before a job is marked failed (expired leases and
+# requeues because the consumer was busy both count)
+MAX_ATTEMPTS = int(os.environ.get("EXPORT_JOB_MAX_ATTEMPTS", "3"))
+
+# How long a requeued job waits before it can be claimed again
+REQUEUE_BACKOFF_SECONDS = int(os.environ.get("EXPORT_JOB_REQUEUE_BACKOFF_SECONDS", "10"))
+
+
+def enqueue_job(
+    db: Session,
+    job_id: str,
+    consumer_id: str,
+    export_type: str,
+    output_filename: str,
+    chunked: bool = False,
+) -> None:
+    db.add(ExportJob(
+        id=job_id,
+        consumer_id=consumer_id,
+        export_type=export_type,
+        output_filename=output_filename,
+        chunked=chunked,
+        status="queued",
+        attempts=0,
+    ))
+    db.flush()
+
+
+def claim_job(db: Session, worker_id: str, lease_seconds: int = LEASE_SECONDS) -> ExportJob | None:
+    """
+    Claim the oldest runnable job for worker_id.
+
+    A job is runnable if it is queued and past its not-before time
+    (lease_expires_at, set on requeue), or running with an expired lease
+    (its worker crashed or lost contact). Jobs are only claimed in order
+    per consumer: a job is skipped while an older job of the same consumer
+    is unfinished. Rows locked by other workers are skipped (SKIP LOCKED),
+    so any number of workers can claim concurrently.
+    The caller must commit to publish the claim.
+    """
+    older = aliased(ExportJob)
+    stmt = (
+        select(ExportJob)
+        .where(
+            or_(
+                and_(
+                    ExportJob.status == "queued",
+                    or_(
+                        ExportJob.lease_expires_at.is_(None),
+                        ExportJob.lease_expires_at <= func.now(),
+                    ),
+                ),
+                and_(
+                    ExportJob.status == "running",
+                    ExportJob.lease_expires_at < func.now(),
+                ),
+            ),
+            ~exists().where(
+                older.consumer_id == ExportJob.consumer_id,
+                older.status.in_(("queued", "running")),
+                older.created_at < ExportJob.created_at,
+            ),
+        )
+        .order_by(ExportJob.created_at)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+
+    while True:
+        job = db.execute(stmt).scalar_one_or_none()
+        if job is None:
+            return None
+
+        if job.attempts >= MAX_ATTEMPTS:
+            job.status = "failed"
+            job.error = f"Gave up after {job.attempts} attempts"
+            job.updated_at = func.now()
+            db.flush()
+            continue
+
+        job.status = "running"
+        job.worker_id = worker_id
+        job.attempts += 1
+        job.lease_expires_at = func.now() + timedelta(seconds=lease_seconds)
+        job.updated_at = func.now()
+        db.flush()
+        db.refresh(job)
+        return job
+
+
+def _update_owned_job(db: Session, job_id: str, owner_id: str, **values) -> bool:
+    """
+    Update a running job only if owner_id still owns it.
+    values are the columns to set, and may include a new worker_id.
+    Returns False if the lease was lost to another worker.
+    """
+    stmt = (
+        update(ExportJob)
+        .where(
+            ExportJob.id == job_id,
+            ExportJob.worker_id == owner_id,
+            ExportJob.status == "running",
+        )
+        .values(updated_at=func.now(), **values)
+        .execution_options(synchronize_session=False)
+    )
+    return db.execute(stmt).rowcount > 0
+
+
+def heartbeat_job(db: Session, job_id: str, worker_id: str, lease_seconds: int = LEASE_SECONDS) -> bool:
+    return _update_owned_job(
+        db, job_id, worker_id,
+        lease_expires_at=func.now() + timedelta(seconds=lease_seconds),
+    )
+
+
+def complete_job(db: Session, job_id: str, worker_id: str) -> bool:
+    return _update_owned_job(db, job_id, worker_id, status="completed", lease_expires_at=None)
+
+
+def fail_job(db: Session, job_id: str, worker_id: str, error: str) -> bool:
+    return _update_owned_job(db, job_id, worker_id, status="failed", error=error, lease_expires_at=None)
+
+
+def requeue_job(
+    db: Session,
+    job_id: str,
+    worker_id: str,
+    backoff_seconds: int = REQUEUE_BACKOFF_SECONDS,
+) -> bool:
+    """
+    Hand a claimed job back to the queue, e.g. when its consumer is locked
+    by an export running elsewhere. The job cannot be claimed again for
+    backoff_seconds, and the attempt still counts toward MAX_ATTEMPTS.
+    """
+    return _update_owned_job(
+        db, job_id, worker_id,
+        status="queued",
+        worker_id=None,
+        lease_expires_at=func.now() + timedelta(seconds=backoff_seconds),
+    )
@@ -0,0 +1,188 @@
+# app/services/rollup.py
+
+import csv
+import os
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy.orm import Session
+
+from app.models import ExportFile
+from app.services.catalog import (
+    delete_export_file,
+    get_base_files,
+    get_delta_files_after,
+    get_snapshot_files,
+    record_export_file,
+)
+from app.services.exports import EXPORT_DIR, CSV_HEADER, DELTA_CSV_HEADER, run_full_export
+from app.services.watermark import upsert_watermark
+
+# Seconds between scheduled rollups started by each app process (0 disables)
+ROLLUP_INTERVAL_SECONDS = float(os.environ.get("ROLLUP_INTERVAL_SECONDS", "900"))
+
+# Snapshots kept after each rollup; older ones are deleted with their catalog rows
+SNAPSHOT_RETENTION = max(1, int(os.environ.get("SNAPSHOT_RETENTION", "3")))
+
+
+def _find_base(db: Session) -> ExportFile | None:
+    """
+    Return the newest full export or snapshot whose file is still on disk.
+    """
+    for ef in get_base_files(db):
+        if (EXPORT_DIR / ef.filename).exists():
+            return ef
+    return None
+
+
+def _resolve_delta_chain(db: Session, base: ExportFile) -> list[ExportFile]:
+    """
+    Build a gap-free chain of delta files starting at base.range_end.
+
+    A delta file covers (range_start, range_end], so it can extend the chain
+    whenever it starts at or before the current end. At each step the file
+    reaching furthest is taken; overlapping rows are resolved by the merge.
+    """
+    candidates = [
+        ef for ef in get_delta_files_after(db, base.range_end)
+        if (EXPORT_DIR / ef.filename).exists()
+    ]
+
+    chain = []
+    chain_end = base.range_end
+    while True:
+        best = None
+        for ef in candidates:
+            if ef.range_start <= chain_end < ef.range_end:
+                if best is None or ef.range_end > best.range_end:
+                    best = ef
+        if best is None:
+            break
+        chain.append(best)
+        chain_end = best.range_end
+
+    return chain
+
+
+def has_pending_rollup(db: Session) -> bool:
+    """
+    True if a rollup would write a snapshot: a base file exists and at
+    least one delta file extends it.
+    """
+    base = _find_base(db)
+    return base is not None and bool(_resolve_delta_chain(db, base))
+
+
+def _prune_snapshots(db: Session, keep: int = SNAPSHOT_RETENTION) -> None:
+    """
+    Delete all but the newest `keep` snapshots, files and catalog rows.
+    Full exports and deltas belong to their consumers and are kept.
+    """
+    for ef in get_snapshot_files(db)[keep:]:
+        (EXPORT_DIR / ef.filename).unlink(missing_ok=True)
+        delete_export_file(db, ef)
+
+
+def _merge_files(base_path: Path, delta_paths: list[Path]) -> list[list[str]]:
+    """
+    Merge a base CSV and delta CSVs by id.
+    Keeps the newest version of each row and drops rows whose newest
+    version is a DELETE. Returns rows in full-export column order,
+    sorted by updated_at like run_full_export.
+    """
+    # id -> (updated_at, row or None for a delete)
+    merged: dict[str, tuple[datetime, list[str] | None]] = {}
+
+    with base_path.open("r", newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        if next(reader, None) != CSV_HEADER:
+            raise ValueError(f"Unexpected header in base file: {base_path.name}")
+        for row in reader:
+            merged[row[0]] = (datetime.fromisoformat(row[4]), row)
+
+    for delta_path in delta_paths:
+        with delta_path.open("r", newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            if next(reader, None) != DELTA_CSV_HEADER:
+                raise ValueError(f"Unexpected header in delta file: {delta_path.name}")
+            for op, *row in reader:
+                updated_at = datetime.fromisoformat(row[4])
+                current = merged.get(row[0])
+                if current is not None and current[0] >= updated_at:
+                    continue
+                merged[row[0]] = (updated_at, None if op == "DELETE" else row)
+
+    live = [(updated_at, row) for updated_at, row in merged.values() if row is not None]
+    live.sort(key=lambda item: item[0])
+    return [row for _, row in live]
+
+
+def _write_rows_to_csv(rows: list[list[str]], filepath: Path) -> int:
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+
+    with filepath.open("w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_HEADER)
+        writer.writerows(rows)
+
+    return len(rows)
+
+
+def run_rollup(db: Session, output_filename: str) -> int:
+    """
+    Snapshot rollup:
+    - Take the newest full export or snapshot as the base.
+    - Merge the gap-free chain of delta files after it by id
+      (newest version wins, deletes are dropped).
+    - Write the result as a new snapshot and record it in the catalog
+      with range_end = end of the chain.
+    - Keep only the newest SNAPSHOT_RETENTION snapshots.
+    Reads only files; no query touches the users table.
+    Returns number of rows in the new snapshot (0 if nothing to compact).
+    """
+    base = _find_base(db)
+    if base is None:
+        return 0
+
+    chain = _resolve_delta_chain(db, base)
+    if not chain:
+        return 0
+
+    rows = _merge_files(
+        EXPORT_DIR / base.filename,
+        [EXPORT_DIR / ef.filename for ef in chain],
+    )
+    rows_written = _write_rows_to_csv(rows, EXPORT_DIR / output_filename)
+
+    record_export_file(db, output_filename, "snapshot", None, chain[-1].range_end, rows_written)
+    _prune_snapshots(db)
+
+    return rows_written
+
+
+def run_bootstrap_export(db: Session, consumer_id: str, output_filename: str) -> int:
+    """
+    Bootstrap export for a new consumer:
+    - Take the newest full export or snapshot plus the delta chain after it.
+    - Write the merged result as the consumer's full file.
+    - Set the consumer's watermark to the end of the chain, so the next
+      incremental/delta export picks up where the files stop.
+    Falls back to run_full_export when no base file is available.
+    Returns number of exported rows.
+    """
+    base = _find_base(db)
+    if base is None:
+        return run_full_export(db, consumer_id, output_filename)
+
+    chain = _resolve_delta_chain(db, base)
+    rows = _merge_files(
+        EXPORT_DIR / base.filename,
+        [EXPORT_DIR / ef.filename for ef in chain],
+    )
+    rows_exported = _write_rows_to_csv(rows, EXPORT_DIR / output_filename)
+
+    chain_end = chain[-1].range_end if chain else base.range_end
+    upsert_watermark(db, consumer_id, chain_end)
+    record_export_file(db, output_filename, "full", None, chain_end, rows_exported)
+
+    return rows_exported
@@ -0,0 +1,149 @@
+# app/worker.py
+import argparse
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+
+from app.database import SessionLocal
+from app.services.jobs import run_export_job
+from app.services.queue import (
+    LEASE_SECONDS,
+    claim_job,
+    complete_job,
+    fail_job,
+    heartbeat_job,
+    requeue_job,
+)
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL_SECONDS = float(os.environ.get("EXPORT_WORKER_POLL_SECONDS", "1"))
+
+def _make_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+def _heartbeat_loop(job_id: str, worker_id: str, stop: threading.Event):
+    # Renew the lease well before it expires; a crashed worker stops
+    # renewing and its job becomes claimable again once the lease runs out
+    while not stop.wait(LEASE_SECONDS / 3):
+        db = SessionLocal()
+        try:
+            if not heartbeat_job(db, job_id, worker_id):
+                logger.warning({
+                    "event": "job_lease_lost",
+                    "jobId": job_id,
+                    "workerId": worker_id,
+                })
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error({
+                "event": "job_heartbeat_failed",
+                "jobId": job_id,
+                "error": str(e),
+            })
+        finally:
+            db.close()
+
+def _finish_job(job_id: str, worker_id: str, finish, *args):
+    """
+    Record the outcome of a job this worker ran.
+
+    If the lease was lost meanwhile (missed heartbeats, then another worker
+    re-claimed the job), the update matches no row and the outcome is
+    dropped. The export this worker committed stands; the job's current
+    owner runs it again, which is safe: incremental/delta exports then find
+    an empty window and write nothing, and full/bootstrap exports rewrite
+    the same output_filename with a fresh image.
+    """
+    db = SessionLocal()
+    try:
+        if not finish(db, job_id, worker_id, *args):
+            logger.warning({
+                "event": "job_lease_lost",
+                "jobId": job_id,
+                "workerId": worker_id,
+            })
+        db.commit()
+    finally:
+        db.close()
+
+def process_next_job(worker_id: str) -> bool:
+    """
+    Claim and run one job from the queue.
+    Returns False if there was nothing to claim.
+    """
+    db = SessionLocal()
+    try:
+        job = claim_job(db, worker_id)
+        db.commit()
+        if job is None:
+            return False
+        job_id = job.id
+        consumer_id = job.consumer_id
+        export_type = job.export_type
+        output_filename = job.output_filename
+        chunked = job.chunked
+    finally:
+        db.close()
+
+    stop = threading.Event()
+    heartbeat = threading.Thread(target=_heartbeat_loop, args=(job_id, worker_id, stop), daemon=True)
+    heartbeat.start()
+    try:
+        rows_exported = run_export_job(job_id, consumer_id, export_type, output_filename, chunked)
+    except Exception as e:
+        stop.set()
+        heartbeat.join()
+        _finish_job(job_id, worker_id, fail_job, str(e))
+        return True
+
+    stop.set()
+    heartbeat.join()
+    if rows_exported is None:
+        # Consumer is being exported by another node; the queue holds the
+        # job back for REQUEUE_BACKOFF_SECONDS before anyone retries it
+        _finish_job(job_id, worker_id, requeue_job)
+    else:
+        _finish_job(job_id, worker_id, complete_job)
+    return True
+
+def run_worker(drain: bool = False, poll_interval: float = POLL_INTERVAL_SECONDS) -> int:
+    """
+    Process jobs until stopped, or until the queue is empty if drain is set.
+    Returns number of jobs processed.
+    """
+    worker_id = _make_worker_id()
+    processed = 0
+
+    logger.info({
+        "event": "worker_started",
+        "workerId": worker_id,
+    })
+
+    while True:
+        if process_next_job(worker_id):
+            processed += 1
+            continue
+        if drain:
+            break
+        time.sleep(poll_interval)
+
+    logger.info({
+        "event": "worker_stopped",
+        "workerId": worker_id,
+        "jobsProcessed": processed,
+    })
+    return processed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run export jobs from the export_jobs queue.")
+    parser.add_argument("--drain", action="store_true", help="exit once the queue is empty")
+    parser.add_argument("--poll-interval", type=float, default=POLL_INTERVAL_SECONDS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=os.environ.get("LOG_LEVEL", "info").upper())
+    run_worker(drain=args.drain, poll_interval=args.poll_interval)
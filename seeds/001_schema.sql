@@ -9,9 +9,39 @@ CREATE TABLE IF NOT EXISTS users (
 );
 -- Index on updated_at for CDC queries
 CREATE INDEX IF NOT EXISTS idx_users_updated_at ON users(updated_at);
+-- Partial index so max(updated_at) over live rows stays an index lookup
+CREATE INDEX IF NOT EXISTS idx_users_live_updated_at ON users(updated_at) WHERE is_deleted = FALSE;
 CREATE TABLE IF NOT EXISTS watermarks (
     id SERIAL PRIMARY KEY,
     consumer_id VARCHAR(255) NOT NULL UNIQUE,
     last_exported_at TIMESTAMPTZ NOT NULL,
     updated_at TIMESTAMPTZ NOT NULL
-);
\ No newline at end of file
+);
+-- Catalog of export files that can be reused for snapshot rollups
+CREATE TABLE IF NOT EXISTS export_files (
+    id SERIAL PRIMARY KEY,
+    filename VARCHAR(512) NOT NULL UNIQUE,
+    export_type VARCHAR(32) NOT NULL,
+    range_start TIMESTAMPTZ,
+    range_end TIMESTAMPTZ NOT NULL,
+    row_count INTEGER NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+CREATE INDEX IF NOT EXISTS idx_export_files_type_range_end ON export_files(export_type, range_end);
+-- Export job queue shared by all worker nodes
+CREATE TABLE IF NOT EXISTS export_jobs (
+    id VARCHAR(36) PRIMARY KEY,
+    consumer_id VARCHAR(255) NOT NULL,
+    export_type VARCHAR(32) NOT NULL,
+    output_filename VARCHAR(512) NOT NULL,
+    chunked BOOLEAN NOT NULL DEFAULT FALSE,
+    status VARCHAR(16) NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker_id VARCHAR(255),
+    lease_expires_at TIMESTAMPTZ,
+    error TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+CREATE INDEX IF NOT EXISTS idx_export_jobs_status_created_at ON export_jobs(status, created_at);
+CREATE INDEX IF NOT EXISTS idx_export_jobs_consumer_id ON export_jobs(consumer_id);
@@ -0,0 +1,8 @@
+import pytest
+from app.services.probe import clear_cache
+@pytest.fixture(autouse=True)
+def fresh_probe_cache():
+    # Tests change rows with raw SQL right before exporting, faster than
+    # the probe cache expires
+    clear_cache()
+    yield
@@ -0,0 +1,127 @@
+import subprocess
+import sys
+import uuid
+from pathlib import Path
+from sqlalchemy import text
+from app.database import engine, SessionLocal
+from app.services.locks import try_consumer_lock
+from app.services.queue import enqueue_job, claim_job, requeue_job
+from app.worker import process_next_job
+OUTPUT_DIR = Path("output")
+def _delete_jobs(job_ids):
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM export_jobs WHERE id = ANY(:ids)"), {"ids": job_ids})
+def test_consumer_lock_is_exclusive_until_commit():
+    consumer_id = "test-consumer-lock"
+    db1 = SessionLocal()
+    db2 = SessionLocal()
+    try:
+        assert try_consumer_lock(db1, consumer_id)
+        assert not try_consumer_lock(db2, consumer_id)
+        db2.rollback()
+        db1.commit()
+        assert try_consumer_lock(db2, consumer_id)
+        db2.commit()
+    finally:
+        db1.close()
+        db2.close()
+def test_expired_lease_is_reclaimed():
+    job_id = str(uuid.uuid4())
+    db = SessionLocal()
+    try:
+        db.execute(text("""
+            INSERT INTO export_jobs (id, consumer_id, export_type, output_filename, status,
+                                     attempts, worker_id, lease_expires_at, created_at, updated_at)
+            VALUES (:id, 'test-consumer-lease', 'full', 'full_test-consumer-lease.csv', 'running',
+                    1, 'crashed-node', NOW() - INTERVAL '1 minute', NOW() - INTERVAL '1 day', NOW());
+        """), {"id": job_id})
+        db.commit()
+        job = claim_job(db, "test-worker")
+        assert job is not None
+        assert job.id == job_id
+        assert job.worker_id == "test-worker"
+        assert job.attempts == 2
+        db.rollback()
+    finally:
+        db.close()
+        _delete_jobs([job_id])
+def test_requeued_job_waits_for_backoff():
+    job_id = str(uuid.uuid4())
+    db = SessionLocal()
+    try:
+        enqueue_job(db, job_id, "test-consumer-requeue", "full", "full_test-consumer-requeue.csv")
+        db.commit()
+        job = claim_job(db, "test-worker")
+        db.commit()
+        assert job is not None and job.id == job_id
+        assert requeue_job(db, job_id, "test-worker", backoff_seconds=60)
+        db.commit()
+        again = claim_job(db, "test-worker")
+        assert again is None or again.id != job_id
+        db.rollback()
+    finally:
+        db.close()
+        _delete_jobs([job_id])
+def test_worker_requeues_job_for_locked_consumer():
+    consumer_id = "test-consumer-worker-locked"
+    job_id = str(uuid.uuid4())
+    holder = SessionLocal()
+    try:
+        enqueue_job(holder, job_id, consumer_id, "full", f"full_{consumer_id}_{job_id}.csv")
+        holder.commit()
+        # Another export holds the consumer until holder's transaction ends
+        assert try_consumer_lock(holder, consumer_id)
+        assert process_next_job("test-worker")
+        with engine.connect() as conn:
+            status, worker_id, attempts, backed_off = conn.execute(
+                text("""
+                    SELECT status, worker_id, attempts, lease_expires_at > NOW()
+                    FROM export_jobs WHERE id = :id
+                """),
+                {"id": job_id},
+            ).one()
+        assert status == "queued"
+        assert worker_id is None
+        assert attempts == 1
+        assert backed_off
+        assert not (OUTPUT_DIR / f"full_{consumer_id}_{job_id}.csv").exists()
+    finally:
+        holder.rollback()
+        holder.close()
+        _delete_jobs([job_id])
+def test_worker_processes_drain_queue():
+    jobs = {}
+    for i in range(3):
+        job_id = str(uuid.uuid4())
+        consumer_id = f"test-consumer-worker-{i}"
+        jobs[job_id] = (consumer_id, f"full_{consumer_id}_{job_id}.csv")
+    try:
+        db = SessionLocal()
+        try:
+            for job_id, (consumer_id, filename) in jobs.items():
+                enqueue_job(db, job_id, consumer_id, "full", filename)
+            db.commit()
+        finally:
+            db.close()
+        workers = [
+            subprocess.Popen([sys.executable, "-m", "app.worker", "--drain"])
+            for _ in range(3)
+        ]
+        for worker in workers:
+            assert worker.wait(timeout=300) == 0
+        with engine.connect() as conn:
+            rows = conn.execute(
+                text("SELECT status, attempts FROM export_jobs WHERE id = ANY(:ids)"),
+                {"ids": list(jobs)},
+            ).all()
+        assert len(rows) == len(jobs)
+        assert all(status == "completed" and attempts == 1 for status, attempts in rows)
+    finally:
+        filenames = [filename for _, filename in jobs.values()]
+        consumer_ids = [consumer_id for consumer_id, _ in jobs.values()]
+        for filename in filenames:
+            (OUTPUT_DIR / filename).unlink(missing_ok=True)
+        with engine.begin() as conn:
+            conn.execute(text("DELETE FROM export_files WHERE filename = ANY(:f)"), {"f": filenames})
+            conn.execute(text("DELETE FROM watermarks WHERE consumer_id = ANY(:c)"), {"c": consumer_ids})
+        _delete_jobs(list(jobs))
@@ -0,0 +1,132 @@
+import csv
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from app.main import app
+from app.database import engine, SessionLocal
+from app.services import jobs
+from app.services.exports import run_incremental_export
+from app.services.probe import has_changes_since, estimate_window_rows, latest_change_at
+client = TestClient(app)
+def test_incremental_and_delta_skip_empty_window():
+    consumer_id = "test-consumer-probe"
+    # Make sure the newest change is a live row, so the full export's
+    # watermark also covers deletes and the delta window is empty too
+    with engine.begin() as conn:
+        conn.execute(text("""
+            UPDATE users
+            SET updated_at = NOW()
+            WHERE id = (SELECT id FROM users WHERE is_deleted = FALSE LIMIT 1);
+        """))
+    resp_full = client.post("/exports/full", headers={"X-Consumer-ID": consumer_id})
+    assert resp_full.status_code == 202
+    for export_type in ("incremental", "delta"):
+        resp = client.post(f"/exports/{export_type}", headers={"X-Consumer-ID": consumer_id})
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["status"] == "skipped"
+        assert data["jobId"] is None
+        assert data["outputFilename"] is None
+def test_incremental_skips_window_with_only_deletes():
+    consumer_id = "test-consumer-probe-delete"
+    with engine.begin() as conn:
+        conn.execute(text("""
+            UPDATE users
+            SET updated_at = NOW()
+            WHERE id = (SELECT id FROM users WHERE is_deleted = FALSE LIMIT 1);
+        """))
+    resp_full = client.post("/exports/full", headers={"X-Consumer-ID": consumer_id})
+    assert resp_full.status_code == 202
+    # Newest change is now a soft-delete, which incremental exports never read
+    with engine.begin() as conn:
+        conn.execute(text("""
+            UPDATE users
+            SET is_deleted = TRUE, updated_at = NOW()
+            WHERE id = (SELECT id FROM users WHERE is_deleted = FALSE LIMIT 1);
+        """))
+    resp = client.post("/exports/incremental", headers={"X-Consumer-ID": consumer_id})
+    assert resp.status_code == 200
+    assert resp.json()["status"] == "skipped"
+def test_probe_sees_new_changes_and_estimates_window():
+    db = SessionLocal()
+    try:
+        latest = latest_change_at(db, max_age=0)
+        assert latest is not None
+        assert not has_changes_since(db, latest)
+        assert has_changes_since(db, latest - timedelta(seconds=1))
+        with engine.begin() as conn:
+            conn.execute(text("""
+                UPDATE users
+                SET updated_at = NOW()
+                WHERE id = (SELECT id FROM users WHERE is_deleted = FALSE LIMIT 1);
+            """))
+        assert has_changes_since(db, latest, max_age=0)
+        assert estimate_window_rows(db, datetime(2000, 1, 1, tzinfo=timezone.utc)) > 0
+    finally:
+        db.close()
+
+def _data_rows(filename):
+    with (Path("output") / filename).open("r", encoding="utf-8") as f:
+        return list(csv.reader(f))[1:]
+def _watermark(consumer_id):
+    resp = client.get("/exports/watermark", headers={"X-Consumer-ID": consumer_id})
+    return datetime.fromisoformat(resp.json()["lastExportedAt"])
+def test_large_windows_use_chunked_path(monkeypatch):
+    consumer_id = "test-consumer-chunked"
+    monkeypatch.setattr("app.services.probe.LARGE_WINDOW_ROWS", 0)
+    monkeypatch.setattr("app.services.jobs.EXPORT_CHUNK_SIZE", 2)
+    chunk_sizes = []
+    for name in ("run_incremental_export", "run_delta_export"):
+        original = getattr(jobs, name)
+        def spy(db, cid, filename, chunk_size=None, _original=original):
+            chunk_sizes.append(chunk_size)
+            return _original(db, cid, filename, chunk_size)
+        monkeypatch.setattr(jobs, name, spy)
+    with engine.begin() as conn:
+        conn.execute(text("""
+            UPDATE users
+            SET updated_at = NOW()
+            WHERE id = (SELECT id FROM users WHERE is_deleted = FALSE LIMIT 1);
+        """))
+    resp_full = client.post("/exports/full", headers={"X-Consumer-ID": consumer_id})
+    assert resp_full.status_code == 202
+    # Incremental: 5 updated rows streamed in chunks of 2
+    with engine.begin() as conn:
+        conn.execute(text("""
+            UPDATE users
+            SET updated_at = NOW()
+            WHERE id IN (SELECT id FROM users WHERE is_deleted = FALSE LIMIT 5);
+        """))
+    resp_incr = client.post("/exports/incremental", headers={"X-Consumer-ID": consumer_id})
+    assert resp_incr.status_code == 202
+    rows = _data_rows(resp_incr.json()["outputFilename"])
+    assert len(rows) == 5
+    assert _watermark(consumer_id) == max(datetime.fromisoformat(r[4]) for r in rows)
+    # Delta: one soft-delete and two updates
+    with engine.begin() as conn:
+        conn.execute(text("""
+            UPDATE users
+            SET is_deleted = TRUE, updated_at = NOW()
+            WHERE id = (SELECT id FROM users WHERE is_deleted = FALSE LIMIT 1);
+        """))
+        conn.execute(text("""
+            UPDATE users
+            SET updated_at = NOW()
+            WHERE id IN (SELECT id FROM users WHERE is_deleted = FALSE LIMIT 2);
+        """))
+    resp_delta = client.post("/exports/delta", headers={"X-Consumer-ID": consumer_id})
+    assert resp_delta.status_code == 202
+    rows = _data_rows(resp_delta.json()["outputFilename"])
+    assert len(rows) == 3
+    assert sorted(r[0] for r in rows) == ["DELETE", "UPDATE", "UPDATE"]
+    assert _watermark(consumer_id) == max(datetime.fromisoformat(r[5]) for r in rows)
+    assert chunk_sizes == [2, 2]
+    # An empty chunked window leaves no file behind
+    db = SessionLocal()
+    try:
+        assert run_incremental_export(db, consumer_id, "incremental_chunked_empty.csv", chunk_size=2) == 0
+        db.rollback()
+    finally:
+        db.close()
+    assert not (Path("output") / "incremental_chunked_empty.csv").exists()
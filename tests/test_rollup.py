@@ -0,0 +1,91 @@
+import csv
+from datetime import datetime
+from pathlib import Path
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from app.main import app
+from app.database import engine
+from app.services.rollup import SNAPSHOT_RETENTION, _merge_files
+client = TestClient(app)
+OUTPUT_DIR = Path("output")
+def _read_csv(filename):
+    with (OUTPUT_DIR / filename).open("r", encoding="utf-8") as f:
+        return list(csv.reader(f))
+def _get_non_deleted_user_count():
+    with engine.connect() as conn:
+        result = conn.execute(text("SELECT COUNT(*) FROM users WHERE is_deleted = FALSE;"))
+        return result.scalar_one()
+def test_merge_keeps_newest_version_and_drops_deletes(tmp_path):
+    header = ["id", "name", "email", "created_at", "updated_at", "is_deleted"]
+    base = tmp_path / "base.csv"
+    delta = tmp_path / "delta.csv"
+    with base.open("w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerow(["1", "A", "a@example.com", "2026-01-01T00:00:00+00:00", "2026-01-01T00:00:00+00:00", "False"])
+        writer.writerow(["2", "B", "b@example.com", "2026-01-01T00:00:00+00:00", "2026-01-02T00:00:00+00:00", "False"])
+    with delta.open("w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["operation"] + header)
+        writer.writerow(["UPDATE", "1", "A2", "a@example.com", "2026-01-01T00:00:00+00:00", "2026-01-03T00:00:00+00:00", "False"])
+        writer.writerow(["DELETE", "2", "B", "b@example.com", "2026-01-01T00:00:00+00:00", "2026-01-03T00:00:00+00:00", "True"])
+        writer.writerow(["INSERT", "3", "C", "c@example.com", "2026-01-04T00:00:00+00:00", "2026-01-04T00:00:00+00:00", "False"])
+    rows = _merge_files(base, [delta])
+    assert [r[0] for r in rows] == ["1", "3"]
+    assert rows[0][1] == "A2"
+def test_rollup_and_bootstrap_from_snapshot():
+    producer_id = "test-consumer-rollup"
+    # 1) Full export + changes + delta export give a base and a chain
+    resp_full = client.post("/exports/full", headers={"X-Consumer-ID": producer_id})
+    assert resp_full.status_code == 202
+    base_wm = client.get("/exports/watermark", headers={"X-Consumer-ID": producer_id}).json()
+    with engine.begin() as conn:
+        inserted_email = conn.execute(text("""
+            INSERT INTO users (name, email, created_at, updated_at, is_deleted)
+            VALUES ('Rollup User', 'rollup_user_' || md5(random()::text) || '@example.com', NOW(), NOW(), FALSE)
+            RETURNING email;
+        """)).scalar_one()
+        deleted_id = conn.execute(text("""
+            UPDATE users
+            SET is_deleted = TRUE, updated_at = NOW()
+            WHERE id = (SELECT id FROM users WHERE is_deleted = FALSE LIMIT 1)
+            RETURNING id;
+        """)).scalar_one()
+    resp_delta = client.post("/exports/delta", headers={"X-Consumer-ID": producer_id})
+    assert resp_delta.status_code == 202
+    # The delta is cataloged with the window it covers, starting at the old watermark
+    with engine.connect() as conn:
+        range_start, range_end = conn.execute(
+            text("SELECT range_start, range_end FROM export_files WHERE filename = :f"),
+            {"f": resp_delta.json()["outputFilename"]},
+        ).one()
+    assert range_start == datetime.fromisoformat(base_wm["lastExportedAt"])
+    assert range_start < range_end
+    # 2) Rollup compacts them into a new snapshot
+    resp_rollup = client.post("/exports/rollup")
+    assert resp_rollup.status_code == 202
+    snapshot_rows = _read_csv(resp_rollup.json()["outputFilename"])
+    assert snapshot_rows[0] == ["id", "name", "email", "created_at", "updated_at", "is_deleted"]
+    assert len(snapshot_rows) - 1 == _get_non_deleted_user_count()
+    assert inserted_email in {r[2] for r in snapshot_rows[1:]}
+    assert str(deleted_id) not in {r[0] for r in snapshot_rows[1:]}
+    with engine.connect() as conn:
+        snapshot_count = conn.execute(
+            text("SELECT COUNT(*) FROM export_files WHERE export_type = 'snapshot'")
+        ).scalar_one()
+    assert snapshot_count <= SNAPSHOT_RETENTION
+    # Nothing new to compact: no job, no file
+    resp_again = client.post("/exports/rollup")
+    assert resp_again.status_code == 200
+    assert resp_again.json()["status"] == "skipped"
+    # 3) A new consumer bootstraps from files and inherits the chain's end
+    consumer_id = "test-consumer-bootstrap"
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM watermarks WHERE consumer_id = :cid"), {"cid": consumer_id})
+    resp_boot = client.post("/exports/bootstrap", headers={"X-Consumer-ID": consumer_id})
+    assert resp_boot.status_code == 202
+    boot_rows = _read_csv(resp_boot.json()["outputFilename"])
+    assert len(boot_rows) - 1 == _get_non_deleted_user_count()
+    producer_wm = client.get("/exports/watermark", headers={"X-Consumer-ID": producer_id}).json()
+    consumer_wm = client.get("/exports/watermark", headers={"X-Consumer-ID": consumer_id}).json()
+    assert consumer_wm["lastExportedAt"] == producer_wm["lastExportedAt"]
@@ -0,0 +1,17 @@
+import os
+import subprocess
+import sys
+from app.database import engine, prewarm_pool
+def test_app_imports_without_database():
+    env = {k: v for k, v in os.environ.items() if k != "DATABASE_URL"}
+    result = subprocess.run(
+        [sys.executable, "-c", "import app.main"],
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+def test_prewarm_fills_pool():
+    warmed = prewarm_pool(2)
+    assert warmed == 2
+    assert engine.pool.checkedin() >= 2